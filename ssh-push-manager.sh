@@ -60,34 +60,171 @@ Version: 3.3.7
 import os
 import sys
 import json
-import argparse
+import shlex
+import functools
+import atexit
+import threading
 import subprocess
-import getpass
-from pathlib import Path
+
+# Parsed configuration keyed by path, stored as (mtime_ns, SSHConfig)
+_CONFIG_CACHE = {}
+
+@functools.lru_cache(maxsize=None)
+def _scp_uses_sftp():
+    """Whether the local scp uses the SFTP protocol by default (OpenSSH 9.0 and later)"""
+    import re
+    
+    try:
+        result = subprocess.run(["ssh", "-V"], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except OSError:
+        return False
+    
+    match = re.search(rb"OpenSSH_(\d+)\.(\d+)", result.stderr)
+    return bool(match) and (int(match.group(1)), int(match.group(2))) >= (9, 0)
+
+class SSHConfig:
+    """SSH settings with the connection arguments built once per configuration"""
+    __slots__ = ('hostname', 'port', 'remote_dir', 'auth_method', 'key_path',
+                 'expanded_key', 'key_ok', 'ssh_base_args', 'scp_base_args', 'batch_args')
+    
+    def __init__(self, hostname, port=22, remote_dir="~/fpga_work", auth_method="key", key_path=None):
+        self.hostname = hostname
+        self.port = port
+        self.remote_dir = remote_dir
+        self.auth_method = auth_method
+        self.key_path = key_path
+        
+        # Expand and check the key once; a missing key is left out so ssh falls back to its defaults
+        self.expanded_key = os.path.expanduser(key_path) if auth_method == 'key' and key_path else None
+        self.key_ok = bool(self.expanded_key) and os.path.exists(self.expanded_key)
+        
+        # Let ssh give up on dead hosts itself rather than relying on Python timeouts
+        options = ("-o", "ConnectTimeout=5", "-o", "ConnectionAttempts=1",
+                   "-o", "ServerAliveInterval=15", "-o", "ServerAliveCountMax=3",
+                   "-o", "StrictHostKeyChecking=accept-new")
+        
+        # With a usable key, never stall on a password prompt; without one (key setup
+        # skipped or failed) ssh must still be allowed to fall back to password authentication
+        self.batch_args = ("-o", "BatchMode=yes") if self.key_ok else ()
+        
+        # ssh takes the port as -p, scp and sftp as -P
+        identity = ("-i", self.expanded_key) if self.key_ok else ()
+        self.ssh_base_args = ("-p", str(port)) + identity + options
+        self.scp_base_args = ("-P", str(port)) + identity + options
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Build a config from its JSON form"""
+        return cls(hostname=data['hostname'],
+                   port=int(data.get('port', 22)),
+                   remote_dir=data.get('remote_dir', "~/fpga_work"),
+                   auth_method=data.get('auth_method', "key"),
+                   key_path=data.get('key_path'))
+    
+    def to_dict(self):
+        """Return the JSON form of this config"""
+        data = {
+            'hostname': self.hostname,
+            'port': self.port,
+            'remote_dir': self.remote_dir,
+            'auth_method': self.auth_method,
+        }
+        if self.key_path:
+            data['key_path'] = self.key_path
+        return data
 
 class SSHPushTool:
-    def __init__(self):
+    # %C is expanded by ssh to a hash of the local host, remote host, port and remote user.
+    # It does not cover the local user, so the socket lives under ~/.ssh rather than a shared /tmp
+    control_path = "~/.ssh/ssh_push_%C"
+    
+    # AES-GCM runs on AES-NI where available; the rest keep servers without GCM reachable
+    ciphers = ("aes128-gcm@openssh.com,aes256-gcm@openssh.com,"
+               "chacha20-poly1305@openssh.com,aes128-ctr,aes192-ctr,aes256-ctr")
+    
+    # Text-like sources that are worth compressing on the wire
+    compressible_extensions = {'.v', '.sv', '.vh', '.vhd', '.vhdl', '.txt', '.log', '.json', '.xml',
+                               '.csv', '.py', '.c', '.h', '.md', '.sh', '.tcl', '.xdc', '.pcf'}
+    
+    # Files at least this big (bitstreams, build outputs) switch rsync to whole-file, in-place writes
+    large_file_size = 16 * 1024 * 1024
+    
+    # Leading bytes of formats that are already compressed
+    compressed_magic = (b'\x1f\x8b', b'PK\x03\x04', b'\xfd7zXZ\x00', b'BZh', b'\x28\xb5\x2f\xfd',
+                        b"7z\xbc\xaf\x27\x1c", b'\x89PNG', b'\xff\xd8\xff', b'GIF8')
+    
+    # How scp reports a missing target directory: SFTP-mode scp (OpenSSH 9.0+) says it
+    # "does not exist", legacy scp fails to open the directory path as a file
+    missing_dir_errors = ("does not exist", "Is a directory", "No such file or directory")
+    
+    def __init__(self, backend="openssh"):
+        self.backend = backend
         self.config_file = ".ssh_push_config.json"
         self.config = self.load_config()
+        self.control_master_started = False
+        self.owns_control_master = False
+        self.compression = False
+        self.remote_dir_ready = False
+        self.remote_dir_lock = threading.Lock()
     
     def load_config(self):
         """Load SSH configuration from file"""
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return None
-        return None
+        try:
+            mtime = os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return None
+        
+        # Skip the read and parse when the file is unchanged since we last saw it
+        cached = _CONFIG_CACHE.get(self.config_file)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        try:
+            with open(self.config_file, 'r') as f:
+                config = SSHConfig.from_dict(json.load(f))
+        except (json.JSONDecodeError, IOError, KeyError, TypeError, ValueError):
+            return None
+        
+        _CONFIG_CACHE[self.config_file] = (mtime, config)
+        return config
+    
+    def _fsync_directory(self, path):
+        """Flush a directory entry so a rename into it survives a crash"""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            # Some platforms and filesystems cannot fsync a directory
+            pass
+        finally:
+            os.close(fd)
     
     def save_config(self, config):
         """Save SSH configuration to file"""
+        config = SSHConfig.from_dict(config)
+        data = json.dumps(config.to_dict(), indent=2).encode()
+        tmp_file = self.config_file + ".tmp"
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            # Write a temporary file and rename it over the old one so a crash never leaves a truncated config
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.config_file)
+            self._fsync_directory(os.path.dirname(os.path.abspath(self.config_file)))
+            _CONFIG_CACHE[self.config_file] = (os.stat(self.config_file).st_mtime_ns, config)
+            self.config = config
             print(f"Configuration saved to {self.config_file}")
             return True
         except IOError as e:
+            # Do not leave a half-written .tmp file behind in the project directory
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
             print(f"Error saving configuration: {e}")
             return False
     
@@ -263,12 +400,95 @@ class SSHPushTool:
             return
         
         print("Current SSH configuration:")
-        print(f"  Hostname: {self.config.get('hostname', 'Not set')}")
-        print(f"  Port: {self.config.get('port', 'Not set')}")
-        print(f"  Remote Directory: {self.config.get('remote_dir', 'Not set')}")
-        print(f"  Auth Method: {self.config.get('auth_method', 'Not set')}")
-        if self.config.get('auth_method') == 'key':
-            print(f"  SSH Key: {self.config.get('key_path', 'Not set')}")
+        print(f"  Hostname: {self.config.hostname}")
+        print(f"  Port: {self.config.port}")
+        print(f"  Remote Directory: {self.config.remote_dir}")
+        print(f"  Auth Method: {self.config.auth_method}")
+        if self.config.auth_method == 'key':
+            print(f"  SSH Key: {self.config.key_path or 'Not set'}")
+    
+    def _ssh_base_args(self, port_flag="-p", batch=True):
+        """Build the ssh/scp options shared by every remote command"""
+        args = list(self.config.scp_base_args if port_flag == "-P" else self.config.ssh_base_args)
+        if batch:
+            args.extend(self.config.batch_args)
+        args.extend(["-o", f"Ciphers={self.ciphers}"])
+        
+        # Compression is negotiated per connection, so with multiplexing the master's setting wins
+        if self.compression:
+            args.extend(["-o", "Compression=yes"])
+        
+        # Multiplex over the control connection opened by start_control_master()
+        args.extend(["-o", f"ControlPath={self.control_path}", "-o", "ControlMaster=auto"])
+        return args
+    
+    def start_control_master(self):
+        """Open one authenticated SSH connection that later ssh/scp calls reuse, returning True if it is up"""
+        if self.control_master_started:
+            return True
+        
+        # The port and user are part of the %C hash, so every control command needs the same arguments
+        hostname = self.config.hostname
+        base_args = self._ssh_base_args()
+        try:
+            os.makedirs(os.path.expanduser("~/.ssh"), mode=0o700, exist_ok=True)
+            
+            # A master left behind by an earlier run (ControlPersist) can be reused as-is
+            check_cmd = ["ssh"] + base_args + ["-O", "check", hostname]
+            if subprocess.run(check_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0:
+                self.control_master_started = True
+                return True
+            
+            # The master is the one connection that authenticates, so it may still ask for a key passphrase
+            master_cmd = (["ssh"] + self._ssh_base_args(batch=False) +
+                          ["-o", "ControlPersist=60s", "-fN", hostname])
+            result = subprocess.run(master_cmd)
+        except Exception as e:
+            print(f"SSH connection error: {e}")
+            return False
+        
+        if result.returncode != 0:
+            # ssh has already printed why; retrying per command would only repeat the same timeout
+            return False
+        
+        self.control_master_started = True
+        self.owns_control_master = True
+        atexit.register(self.stop_control_master)
+        return True
+    
+    def stop_control_master(self):
+        """Close the shared SSH control connection if this run opened it"""
+        if not self.owns_control_master:
+            return
+        
+        exit_cmd = ["ssh"] + self._ssh_base_args() + ["-O", "exit", self.config.hostname]
+        try:
+            subprocess.run(exit_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception:
+            pass
+        self.control_master_started = False
+        self.owns_control_master = False
+    
+    def _quote_remote_path(self, path):
+        """Quote a path for the remote shell, leaving a leading ~ for it to expand"""
+        if path == "~":
+            return path
+        if path.startswith("~/"):
+            return "~/" + shlex.quote(path[2:])
+        return shlex.quote(path)
+    
+    def _scp_remote_path(self, path):
+        """Format a remote path for an scp target"""
+        # Legacy scp hands the path to the remote shell, which would split it on spaces.
+        # SFTP-mode scp takes it literally, and quoting it there would break the transfer
+        return path if _scp_uses_sftp() else self._quote_remote_path(path)
+    
+    def _remote_exec(self, *shell_cmds, **run_kwargs):
+        """Run shell commands chained with && on the remote host in a single ssh call"""
+        ssh_cmd = ["ssh"] + self._ssh_base_args()
+        ssh_cmd.append(self.config.hostname)
+        ssh_cmd.append(" && ".join(shell_cmds))
+        return subprocess.run(ssh_cmd, **run_kwargs)
     
     def test_connection(self):
         """Test SSH connection"""
@@ -278,31 +498,48 @@ class SSHPushTool:
         
         print("Testing SSH connection...")
         
-        # Build SSH command
-        ssh_cmd = ["ssh"]
-        
-        if self.config.get('auth_method') == 'key':
-            ssh_cmd.extend(["-i", os.path.expanduser(self.config['key_path'])])
+        if self.backend == "asyncssh":
+            if self._run_asyncssh(self._asyncssh_test):
+                print("SSH connection successful!")
+                return True
+            print("SSH connection failed.")
+            return False
         
-        ssh_cmd.extend(["-p", str(self.config['port'])])
-        ssh_cmd.append(self.config['hostname'])
-        ssh_cmd.append("echo 'SSH connection successful!'")
+        if not self.start_control_master():
+            print("SSH connection failed.")
+            return False
         
         try:
-            result = subprocess.run(ssh_cmd, capture_output=True, text=True, timeout=10)
+            # Only stderr is interesting, and only when the connection fails
+            result = self._remote_exec("echo 'SSH connection successful!'",
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
             if result.returncode == 0:
                 print("SSH connection successful!")
                 return True
             else:
-                print(f"SSH connection failed: {result.stderr}")
+                print(f"SSH connection failed: {result.stderr.decode('utf-8', 'replace')}")
                 return False
-        except subprocess.TimeoutExpired:
-            print("SSH connection timed out.")
-            return False
         except Exception as e:
             print(f"SSH connection error: {e}")
             return False
     
+    def ensure_remote_directory(self):
+        """Create the remote working directory, returning True if it exists afterwards"""
+        # Parallel scp workers can all hit a missing directory at once; create it only once
+        with self.remote_dir_lock:
+            if self.remote_dir_ready:
+                return True
+            
+            remote_dir = self._quote_remote_path(self.config.remote_dir)
+            try:
+                result = self._remote_exec(f"mkdir -p {remote_dir}",
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except Exception:
+                return False
+            
+            self.remote_dir_ready = result.returncode == 0
+            return self.remote_dir_ready
+    
     def list_remote_files(self):
         """List files in remote directory"""
         if not self.config:
@@ -311,19 +548,25 @@ class SSHPushTool:
         
         print("Listing remote files...")
         
-        # Build SSH command
-        ssh_cmd = ["ssh"]
+        if self.backend == "asyncssh":
+            names = self._run_asyncssh(self._asyncssh_list)
+            if names is not None:
+                print("Remote files:")
+                print("\n".join(names))
+            return
         
-        if self.config.get('auth_method') == 'key':
-            ssh_cmd.extend(["-i", os.path.expanduser(self.config['key_path'])])
+        if not self.start_control_master():
+            print("Failed to list remote files: could not connect.")
+            return
         
-        ssh_cmd.extend(["-p", str(self.config['port'])])
-        ssh_cmd.append(self.config['hostname'])
-        ssh_cmd.append(f"ls -la {self.config['remote_dir']}")
+        # Create and list in one round trip so a fresh setup lists an empty directory instead of failing
+        remote_dir = self._quote_remote_path(self.config.remote_dir)
         
         try:
-            result = subprocess.run(ssh_cmd, capture_output=True, text=True, timeout=10)
+            result = self._remote_exec(f"mkdir -p {remote_dir}", f"ls -la {remote_dir}",
+                                       capture_output=True, text=True)
             if result.returncode == 0:
+                self.remote_dir_ready = True
                 print("Remote files:")
                 print(result.stdout)
             else:
@@ -331,61 +574,347 @@ class SSHPushTool:
         except Exception as e:
             print(f"Error listing remote files: {e}")
     
-    def push_files(self, files, verbose=False):
-        """Push files to remote device"""
-        if not self.config:
-            print("No configuration found. Run setup first.")
-            return False
+    def _home_relative_remote_dir(self):
+        """Remote directory relative to the login directory, for tools that do not expand ~"""
+        remote_dir = self.config.remote_dir
+        if remote_dir == "~":
+            return "."
+        if remote_dir.startswith("~/"):
+            return remote_dir[2:]
+        return remote_dir
+    
+    def _push_via_rsync(self, files, verbose=False, large=False):
+        """Push all files with a single rsync call, returning (pushed, returncode, stderr)"""
+        ssh_cmd = " ".join(shlex.quote(arg) for arg in ["ssh"] + self._ssh_base_args())
+        rsync_cmd = ["rsync", "-e", ssh_cmd, "--times", "--protect-args"]
         
-        if not files:
-            print("No files specified to push.")
-            return False
+        if verbose:
+            rsync_cmd.append("--verbose")
         
-        print(f"Pushing {len(files)} file(s) to remote device...")
+        if large:
+            # Skip the delta scan and temp-file copy; an interrupted transfer keeps what was written
+            rsync_cmd.extend(["--inplace", "--whole-file", "--no-compress"])
+        rsync_cmd.append("--")
+        rsync_cmd.extend(files)
+        rsync_cmd.append(f"{self.config.hostname}:{self._home_relative_remote_dir()}/")
         
-        # Build SCP command
+        if verbose:
+            print(f"Running: {' '.join(rsync_cmd)}")
+        
+        try:
+            # Verbose runs show rsync's own output instead of capturing it
+            result = subprocess.run(rsync_cmd, capture_output=not verbose, text=True)
+        except Exception as e:
+            return set(), -1, str(e)
+        
+        if result.returncode == 0:
+            # A clean exit means every file is in place, sent or already up to date
+            return set(files), 0, result.stderr or ""
+        
+        # rsync names each file before sending it, so a listed file may still have failed.
+        # Resend the whole batch; rsync's quick check makes a later re-run cheap
+        return set(), result.returncode, "" if verbose else result.stderr
+    
+    def _sftp_quote(self, path):
+        """Quote a path for an sftp batch script"""
+        return '"' + path.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    
+    def _push_via_sftp(self, files, verbose=False):
+        """Push all files over one sftp session with pipelined puts, returning True on success"""
+        sftp_cmd = ["sftp", "-b", "-"] + self._ssh_base_args("-P") + [self.config.hostname]
+        
+        # sftp starts in the login directory, so a ~-relative path works without expansion.
+        # sftp has no "mkdir -p", so create each level; the leading "-" ignores "already exists"
+        remote_dir = self._home_relative_remote_dir()
+        parts = remote_dir.split("/")
+        batch = [f"-mkdir {self._sftp_quote('/'.join(parts[:i]))}"
+                 for i in range(1, len(parts) + 1) if parts[i - 1] not in ("", ".")]
+        batch.append(f"cd {self._sftp_quote(remote_dir)}")
+        batch.extend(f"put {self._sftp_quote(file_path)}" for file_path in files)
+        batch.append("bye")
+        
+        if verbose:
+            print(f"Running: {' '.join(sftp_cmd)}")
+        
+        try:
+            result = subprocess.run(sftp_cmd, input=("\n".join(batch) + "\n").encode(),
+                                    stdout=None if verbose else subprocess.DEVNULL,
+                                    stderr=None if verbose else subprocess.PIPE)
+        except Exception as e:
+            if verbose:
+                print(f"sftp error, falling back to scp: {e}")
+            return False
+        
+        if result.returncode != 0 and verbose:
+            print(f"sftp exited with code {result.returncode}, falling back to scp")
+        return result.returncode == 0
+    
+    def _scp_base_command(self, verbose=False):
+        """Build the scp command prefix shared by every file in a batch"""
         scp_cmd = ["scp"]
         
         if verbose:
             scp_cmd.append("-v")
         
-        if self.config.get('auth_method') == 'key':
-            scp_cmd.extend(["-i", os.path.expanduser(self.config['key_path'])])
+        scp_cmd.extend(self._ssh_base_args("-P"))
+        return scp_cmd
+    
+    def _push_one(self, file_path, scp_base, destination, verbose=False):
+        """Push a single file, returning (file_path, ok, stderr)"""
+        ok, stderr = self._scp_file(scp_base + [file_path, destination], verbose)
         
-        scp_cmd.extend(["-P", str(self.config['port'])])
-        scp_cmd.extend(files)
-        scp_cmd.append(f"{self.config['hostname']}:{self.config['remote_dir']}")
+        # The remote directory is only created when scp says it is missing, saving a
+        # round trip on every other push. Verbose runs do not capture stderr, so retry on any failure
+        if not ok and (verbose or any(error in stderr for error in self.missing_dir_errors)):
+            if self.ensure_remote_directory():
+                ok, stderr = self._scp_file(scp_base + [file_path, destination], verbose)
         
+        return file_path, ok, stderr
+    
+    def _scp_file(self, scp_cmd, verbose=False):
+        """Run one scp command, returning (ok, stderr)"""
         try:
             if verbose:
                 print(f"Running: {' '.join(scp_cmd)}")
             
-            result = subprocess.run(scp_cmd, timeout=60)
-            if result.returncode == 0:
-                print("Files pushed successfully!")
-                return True
-            else:
-                print("Failed to push files.")
-                return False
+            # Progress meters from parallel transfers would interleave, so only show them when verbose
+            result = subprocess.run(scp_cmd, timeout=60,
+                                    stdout=None if verbose else subprocess.DEVNULL,
+                                    stderr=None if verbose else subprocess.PIPE)
+            if result.returncode != 0 and result.stderr:
+                return False, result.stderr.decode('utf-8', 'replace')
+            return result.returncode == 0, ""
         except subprocess.TimeoutExpired:
-            print("File transfer timed out.")
-            return False
+            return False, "File transfer timed out."
         except Exception as e:
-            print(f"Error pushing files: {e}")
+            return False, str(e)
+    
+    def _stat_files(self, files):
+        """Check local files up front, returning (existing files largest first, missing files, sizes)"""
+        # Group by directory so each one is listed once with scandir instead of a stat per file
+        by_dir = {}
+        for file_path in dict.fromkeys(files):
+            by_dir.setdefault(os.path.dirname(file_path), {})[os.path.basename(file_path)] = file_path
+        
+        sizes = {}
+        for directory, names in by_dir.items():
+            try:
+                with os.scandir(directory or '.') as entries:
+                    for entry in entries:
+                        if entry.name in names and entry.is_file():
+                            sizes[names[entry.name]] = entry.stat().st_size
+            except OSError:
+                continue
+        
+        existing = sorted(sizes, key=sizes.get, reverse=True)
+        missing = [file_path for file_path in dict.fromkeys(files) if file_path not in sizes]
+        return existing, missing, sizes
+    
+    def _is_compressible(self, file_path):
+        """Guess whether a file shrinks under SSH compression"""
+        if os.path.splitext(file_path)[1].lower() in self.compressible_extensions:
+            return True
+        
+        try:
+            with open(file_path, 'rb') as f:
+                header = f.read(8)
+        except IOError:
             return False
+        return not header.startswith(self.compressed_magic)
+    
+    def push_files(self, files, verbose=False, jobs=4):
+        """Push files to remote device"""
+        if not self.config:
+            print("No configuration found. Run setup first.")
+            return False
+        
+        if not files:
+            print("No files specified to push.")
+            return False
+        
+        # Every file lands in the same remote directory, so sources sharing a name would overwrite each other
+        names = {}
+        duplicates = []
+        for file_path in dict.fromkeys(files):
+            name = os.path.basename(file_path)
+            if name in names:
+                print(f"Skipping {file_path}: same file name as {names[name]}")
+                duplicates.append(file_path)
+            else:
+                names[name] = file_path
+        
+        # Reject bad paths before any network I/O; largest files go first to shorten the tail
+        files, missing, sizes = self._stat_files(list(names.values()))
+        total = len(files) + len(missing) + len(duplicates)
+        total_bytes = sum(sizes.values())
+        for file_path in missing:
+            print(f"File not found: {file_path}")
+        
+        if not files:
+            print("No files to push.")
+            return False
+        
+        print(f"Pushing {len(files)} file(s), {total_bytes / (1024 * 1024):.2f} MB total, to remote device...")
+        
+        success_count = 0
+        
+        if self.backend == "asyncssh":
+            # All puts share one in-process connection; there is nothing to fall back to
+            for file_path, error in self._run_asyncssh(self._asyncssh_push, files, jobs) or []:
+                if error is None:
+                    success_count += 1
+                    print(f"Pushed: {file_path}")
+                else:
+                    print(f"Failed to push {file_path}: {error}")
+            files = []
+        else:
+            # Compress when most of the bytes are text-like; compressing archives only burns CPU
+            compressible_bytes = sum(sizes[file_path] for file_path in files if self._is_compressible(file_path))
+            self.compression = compressible_bytes * 2 >= total_bytes
+            if not self.start_control_master():
+                print("Failed to push files: could not connect.")
+                return False
+        
+        # One rsync process for the whole batch; whatever it could not send falls through
+        import shutil
+        if files and shutil.which("rsync"):
+            large = any(sizes[file_path] >= self.large_file_size for file_path in files)
+            pushed, returncode, stderr = self._push_via_rsync(files, verbose, large)
+            for file_path in files:
+                if file_path in pushed:
+                    print(f"Pushed: {file_path}")
+            success_count += len(pushed)
+            files = [file_path for file_path in files if file_path not in pushed]
+            
+            if files and verbose:
+                print(f"rsync exited with code {returncode}, falling back. {stderr.strip()}".rstrip())
+        
+        # Many small files: one sftp channel with pipelined puts beats a process per file
+        if len(files) > 4 and self._push_via_sftp(files, verbose):
+            for file_path in files:
+                print(f"Pushed: {file_path}")
+            success_count += len(files)
+            files = []
+        
+        if files:
+            from concurrent.futures import ThreadPoolExecutor, as_completed
+            
+            # Transfers run as parallel channels over the shared control connection;
+            # keep the pool small so we stay under sshd's MaxSessions (default 10)
+            jobs = max(1, min(jobs, len(files)))
+            
+            # Everything but the source file is the same for the whole batch
+            scp_base = self._scp_base_command(verbose)
+            destination = f"{self.config.hostname}:{self._scp_remote_path(self.config.remote_dir + '/')}"
+            
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = [executor.submit(self._push_one, file_path, scp_base, destination, verbose)
+                           for file_path in files]
+                for future in as_completed(futures):
+                    file_path, ok, stderr = future.result()
+                    if ok:
+                        success_count += 1
+                        print(f"Pushed: {file_path}")
+                    elif stderr.strip():
+                        print(f"Failed to push {file_path}: {stderr.strip()}")
+                    else:
+                        print(f"Failed to push {file_path}.")
+        
+        if success_count == total:
+            print("Files pushed successfully!")
+            return True
+        
+        print(f"Pushed {success_count} of {total} file(s).")
+        return False
+    
+    def _asyncssh_options(self, asyncssh):
+        """Translate the configuration into asyncssh.connect() arguments"""
+        username, _, host = self.config.hostname.rpartition('@')
+        options = {'host': host, 'port': self.config.port}
+        
+        if username:
+            options['username'] = username
+        
+        if self.config.auth_method == 'password':
+            import getpass
+            options['password'] = getpass.getpass(f"{self.config.hostname}'s password: ")
+        elif self.config.key_ok:
+            try:
+                options['client_keys'] = [asyncssh.read_private_key(self.config.expanded_key)]
+            except asyncssh.KeyImportError:
+                # Encrypted key: an agent probably holds it already, otherwise ask for the passphrase
+                if not os.environ.get('SSH_AUTH_SOCK'):
+                    import getpass
+                    passphrase = getpass.getpass(f"Enter passphrase for key '{self.config.key_path}': ")
+                    options['client_keys'] = [asyncssh.read_private_key(self.config.expanded_key, passphrase)]
+        
+        # Without client_keys, asyncssh tries the agent and the default keys in ~/.ssh
+        return options
+    
+    def _run_asyncssh(self, operation, *args):
+        """Run operation(conn, *args) on a single asyncssh connection, returning its result or None"""
+        try:
+            import asyncio
+            import asyncssh
+        except ImportError:
+            print("The asyncssh backend needs the asyncssh package: pip install asyncssh")
+            return None
+        
+        async def run():
+            async with asyncssh.connect(**self._asyncssh_options(asyncssh)) as conn:
+                return await operation(conn, *args)
+        
+        try:
+            return asyncio.run(run())
+        except (asyncssh.KeyImportError, asyncssh.KeyEncryptionError) as e:
+            # Wrong passphrase, or a key format this asyncssh install cannot decrypt
+            print(f"Could not load SSH key {self.config.key_path}: {e}")
+            return None
+        except (OSError, asyncssh.Error) as e:
+            print(f"Remote operation failed: {e}")
+            return None
+    
+    async def _asyncssh_test(self, conn):
+        """Run a trivial remote command over an asyncssh connection"""
+        result = await conn.run("echo ok")
+        return result.exit_status == 0
+    
+    async def _asyncssh_list(self, conn):
+        """List the remote directory over SFTP"""
+        async with conn.start_sftp_client() as sftp:
+            names = await sftp.listdir(self._home_relative_remote_dir())
+        return sorted(name for name in names if name not in (".", ".."))
+    
+    async def _asyncssh_push(self, conn, files, jobs):
+        """Upload files concurrently over one SFTP channel, returning [(file_path, error or None)]"""
+        import asyncio
+        
+        # Every put holds a local and a remote file handle open, so cap how many run at once
+        # to keep large batches under the open-file limit
+        limit = asyncio.Semaphore(max(1, jobs))
+        
+        async def put(file_path):
+            async with limit:
+                await sftp.put(file_path, remote_dir)
+        
+        remote_dir = self._home_relative_remote_dir()
+        async with conn.start_sftp_client() as sftp:
+            await sftp.makedirs(remote_dir, exist_ok=True)
+            # SFTP pipelines the requests of every put on the same channel
+            results = await asyncio.gather(*[put(file_path) for file_path in files],
+                                           return_exceptions=True)
+        
+        return [(file_path, None if not isinstance(result, Exception) else str(result))
+                for file_path, result in zip(files, results)]
     
     def get_all_non_hidden_files(self):
         """Get all non-hidden files in the current directory"""
-        import os
-        files = []
-        current_dir = os.getcwd()
-        
         try:
-            for item in os.listdir(current_dir):
-                item_path = os.path.join(current_dir, item)
-                # Skip hidden files (starting with .) and directories
-                if not item.startswith('.') and os.path.isfile(item_path):
-                    files.append(item)
+            # DirEntry.is_file() reuses the file type from the directory listing,
+            # so only symlinks need an extra stat. Skip hidden files (starting with .) and directories
+            with os.scandir('.') as entries:
+                files = [entry.name for entry in entries
+                         if not entry.name.startswith('.') and entry.is_file()]
             
             if not files:
                 print("No non-hidden files found in current directory.")
@@ -439,20 +968,19 @@ class SSHPushTool:
             print(f"Created test file: {test_file_path} ({actual_size_mb:.2f} MB)")
             
             # Build SCP command for speed test
-            scp_cmd = ["scp"]
-            
-            if self.config.get('auth_method') == 'key':
-                scp_cmd.extend(["-i", os.path.expanduser(self.config['key_path'])])
-            
-            scp_cmd.extend(["-P", str(self.config['port'])])
+            if not self.start_control_master():
+                print("Speed test failed: could not connect.")
+                return False
+            scp_cmd = ["scp"] + self._ssh_base_args("-P")
             scp_cmd.append(test_file_path)
-            scp_cmd.append(f"{self.config['hostname']}:{self.config['remote_dir']}/speed_test.tmp")
+            remote_file = self._scp_remote_path(f"{self.config.remote_dir}/speed_test.tmp")
+            scp_cmd.append(f"{self.config.hostname}:{remote_file}")
             
             print("Starting file transfer speed test...")
             start_time = time.time()
             
             try:
-                result = subprocess.run(scp_cmd, capture_output=True, text=True, timeout=300)
+                result = subprocess.run(scp_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=300)
                 end_time = time.time()
                 
                 if result.returncode == 0:
@@ -468,18 +996,13 @@ class SSHPushTool:
                     print(f"Transfer speed: {speed_mbps:.2f} Mbps")
                     
                     # Clean up remote test file
-                    cleanup_cmd = ["ssh"]
-                    if self.config.get('auth_method') == 'key':
-                        cleanup_cmd.extend(["-i", os.path.expanduser(self.config['key_path'])])
-                    cleanup_cmd.extend(["-p", str(self.config['port'])])
-                    cleanup_cmd.append(self.config['hostname'])
-                    cleanup_cmd.append(f"rm -f {self.config['remote_dir']}/speed_test.tmp")
-                    
-                    subprocess.run(cleanup_cmd, capture_output=True, timeout=10)
+                    remote_file = self._quote_remote_path(f"{self.config.remote_dir}/speed_test.tmp")
+                    self._remote_exec(f"rm -f {remote_file}",
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                     
                     return True
                 else:
-                    print(f"Speed test failed: {result.stderr}")
+                    print(f"Speed test failed: {result.stderr.decode('utf-8', 'replace')}")
                     return False
                     
             except subprocess.TimeoutExpired:
@@ -500,7 +1023,12 @@ class SSHPushTool:
                 except:
                     pass
 
-def main():
+@functools.lru_cache(maxsize=None)
+def _build_parser():
+    """Build the command-line parser once per process"""
+    # Only the command-line entry point needs argparse
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="SSH File Push Tool - Push files to remote device",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -517,6 +1045,8 @@ Examples:
   ssh-push -st                        # Test file transfer speed (short)
   ssh-push --config                   # Show configuration
   ssh-push --verbose blinky.v         # Push with verbose output
+  ssh-push --jobs 8 --all             # Push all files, 8 at a time
+  ssh-push --backend asyncssh --all   # Push over one in-process connection
         """
     )
     
@@ -529,11 +1059,17 @@ Examples:
     parser.add_argument('--speed-test', '-st', action='store_true', help='Test file transfer speed with a test file')
     parser.add_argument('--config', '-c', action='store_true', help='Show current configuration')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    parser.add_argument('--jobs', '-j', type=int, default=4, help='Number of files to push in parallel (default: 4)')
+    parser.add_argument('--backend', choices=['openssh', 'asyncssh'], default='openssh',
+                        help='Transport for --test, --list and pushes; asyncssh needs "pip install asyncssh" (default: openssh)')
     parser.add_argument('--version', action='version', version='ssh-push 3.3.7')
-    
+    return parser
+
+def main():
+    parser = _build_parser()
     args = parser.parse_args()
     
-    tool = SSHPushTool()
+    tool = SSHPushTool(backend=args.backend)
     
     # Handle different commands
     if args.setup:
@@ -544,7 +1080,7 @@ Examples:
         # Push all non-hidden files
         files_to_push = tool.get_all_non_hidden_files()
         if files_to_push:
-            tool.push_files(files_to_push, args.verbose)
+            tool.push_files(files_to_push, args.verbose, args.jobs)
     elif args.list:
         tool.list_remote_files()
     elif args.test:
@@ -554,7 +1090,7 @@ Examples:
     elif args.config:
         tool.show_config()
     elif args.files:
-        tool.push_files(args.files, args.verbose)
+        tool.push_files(args.files, args.verbose, args.jobs)
     else:
         parser.print_help()
 